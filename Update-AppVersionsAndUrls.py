@@ -1,16 +1,43 @@
 # Update-AppVersionsAndUrls.py
 import os
+import sys
 import json
+import logging
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 from pathlib import Path
 import re
-from packaging.version import parse as parse_version 
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from packaging.version import InvalidVersion, Version, parse as parse_version 
+from updater_common import atomic_write_bytes, dump_manifest_bytes, load_json_cache, parse_manifest_bytes, save_json_cache
 
 # --- Configuration ---
 BUCKET_PATH_STR = "bucket" 
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 REQUEST_TIMEOUT_SECONDS = 30 
 CONFIG_FILE_NAME = "apps_config.json" 
+MAX_CONCURRENT_REQUESTS = 10 # Upper bound on parallel GitHub API calls
+MAX_CONCURRENT_MANIFEST_READS = 16
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+GITHUB_RATE_LIMIT_URL = "https://api.github.com/rate_limit"
+RATE_LIMIT_MAX_WAIT_SECONDS = 300 # Longest pause for a quota reset before giving up on the remaining requests
+GRAPHQL_MAX_REPOS_PER_QUERY = 100 # GitHub caps the number of aliased fields per query
+RELEASES_PER_PAGE = 10 # Only the newest releases matter; the REST default (30) mostly fetches history
+GRAPHQL_ASSETS_PER_RELEASE = 100
+CACHE_DIR_NAME = ".cache" # Persisted between workflow runs by actions/cache, not committed
+ETAG_CACHE_FILE_NAME = "github_etags.json"
+# Standard version pattern (e.g., X.Y.Z, X.Y.Z-beta); compiled once instead of per tag
+VERSION_REGEX = re.compile(r"(\d+(?:\.\d+)*(?:[-.].+)?)")
+
+# --- Logging ---
+# Set UPDATER_LOG_LEVEL=DEBUG to also see per-request and per-asset details
+logging.basicConfig(level=os.environ.get("UPDATER_LOG_LEVEL", "INFO").upper(), format="%(message)s", stream=sys.stdout)
+log = logging.getLogger("update_app_versions")
 
 # --- GitHub API Configuration ---
 # Read the token from the environment variable set by the GitHub Actions workflow
@@ -19,46 +46,347 @@ GITHUB_API_TOKEN = os.environ.get("GH_API_TOKEN")
                                     
 GITHUB_API_HEADERS = {"Accept": "application/vnd.github.v3+json"}
 if GITHUB_API_TOKEN:
-    print("[INFO] GitHub API token (GH_API_TOKEN) found. Using it for authenticated requests.")
+    log.info("[INFO] GitHub API token (GH_API_TOKEN) found. Using it for authenticated requests.")
     GITHUB_API_HEADERS["Authorization"] = f"token {GITHUB_API_TOKEN}"
 else:
-    print("[WARNING] GitHub API token (GH_API_TOKEN) not found in environment. Making unauthenticated requests (may hit rate limits).")
+    log.warning("[WARNING] GitHub API token (GH_API_TOKEN) not found in environment. Making unauthenticated requests (may hit rate limits).")
+
+# One session for all API calls, so requests reuse kept-alive TLS connections instead of reconnecting
+GITHUB_API_SESSION = requests.Session()
+GITHUB_API_SESSION.headers.update(GITHUB_API_HEADERS)
+GITHUB_API_SESSION.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONCURRENT_REQUESTS))
+
+@dataclass(frozen=True)
+class AppConfig:
+    """One validated entry of apps_config.json."""
+    manifest_file: str
+    repo: str
+    asset_keywords: tuple[str, ...] = ()
+    version_strip_prefix: str = ""
+    allow_prerelease: bool = False
 
-def load_apps_config(config_file_path: Path) -> list:
-    """Loads the application configuration from a JSON file."""
+def parse_app_config(entry) -> AppConfig | None:
+    """Builds an AppConfig from a raw config entry, or returns None if the entry is invalid."""
+    if not isinstance(entry, dict):
+        return None
+    manifest_file = entry.get("manifest_file")
+    repo = entry.get("repo")
+    asset_keywords = entry.get("asset_keywords", [])
+    version_strip_prefix = entry.get("version_strip_prefix")
+    if version_strip_prefix is None: # Absent or null both mean no prefix
+        version_strip_prefix = ""
+    allow_prerelease = entry.get("allow_prerelease", False)
+    if not (manifest_file and isinstance(manifest_file, str) and repo and isinstance(repo, str)):
+        return None
+    if not isinstance(asset_keywords, list) or not all(isinstance(keyword, str) for keyword in asset_keywords):
+        return None
+    if not isinstance(version_strip_prefix, str) or not isinstance(allow_prerelease, bool):
+        return None
+    return AppConfig(
+        manifest_file=manifest_file,
+        repo=repo,
+        asset_keywords=tuple(asset_keywords),
+        version_strip_prefix=version_strip_prefix,
+        allow_prerelease=allow_prerelease,
+    )
+
+def load_apps_config(config_file_path: Path) -> list[AppConfig]:
+    """Loads and validates the application configuration from a JSON file; invalid entries are skipped."""
     if not config_file_path.exists():
-        print(f"[ERROR] Configuration file '{config_file_path}' not found.")
+        log.error(f"[ERROR] Configuration file '{config_file_path}' not found.")
         return []
     try:
-        with open(config_file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        raw_entries = orjson.loads(config_file_path.read_bytes())
     except Exception as e:
-        print(f"[ERROR] Could not read or parse configuration file '{config_file_path}': {e}")
+        log.error(f"[ERROR] Could not read or parse configuration file '{config_file_path}': {e}")
+        return []
+    if not isinstance(raw_entries, list):
+        log.error(f"[ERROR] Configuration file '{config_file_path}' must contain a JSON list of app entries.")
         return []
 
-def get_github_releases_info(repo_owner_slash_repo: str) -> list | None:
-    """Fetches all release information from GitHub API."""
+    apps_config = []
+    for entry in raw_entries:
+        app_config = parse_app_config(entry)
+        if app_config is None:
+            log.warning(f"[WARNING] Skipping invalid app config entry: {entry} (needs 'manifest_file' and 'repo' strings, 'asset_keywords' list of strings, optional 'version_strip_prefix' string and 'allow_prerelease' true/false)")
+            continue
+        apps_config.append(app_config)
+    return apps_config
+
+# REST 'core' quota as last reported by GitHub; shared by the fetch worker threads
+rest_rate_limit_state = {"remaining": None, "reset": 0}
+rest_rate_limit_lock = threading.Lock()
+
+def get_rate_limit_status() -> dict | None:
+    """Reads the REST 'core' quota from /rate_limit (this call does not count against the quota)."""
+    try:
+        response = GITHUB_API_SESSION.get(GITHUB_RATE_LIMIT_URL, timeout=REQUEST_TIMEOUT_SECONDS)
+        response.raise_for_status()
+        core_quota = orjson.loads(response.content)["resources"]["core"]
+        return {"remaining": int(core_quota["remaining"]), "reset": int(core_quota["reset"])}
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+        log.warning(f"    [WARNING] Could not read GitHub API rate limit status: {e}")
+        return None
+
+def wait_for_rate_limit_reset(reset_epoch: int) -> bool:
+    """Sleeps until the quota resets, unless that is more than RATE_LIMIT_MAX_WAIT_SECONDS away."""
+    wait_seconds = max(0, reset_epoch - time.time()) + 1
+    if wait_seconds > RATE_LIMIT_MAX_WAIT_SECONDS:
+        return False
+    log.info(f"    [INFO] GitHub API rate limit exhausted. Waiting {wait_seconds:.0f}s for it to reset...")
+    time.sleep(wait_seconds)
+    return True
+
+def reserve_rest_request() -> bool:
+    """Claims one request from the tracked REST quota, pausing for a reset if needed. Returns False if none is left."""
+    with rest_rate_limit_lock: # Held while sleeping so the other workers pause as well
+        if rest_rate_limit_state["remaining"] is None:
+            return True # Quota unknown; let GitHub decide
+        if rest_rate_limit_state["remaining"] <= 0:
+            if not wait_for_rate_limit_reset(rest_rate_limit_state["reset"]):
+                return False
+            rest_rate_limit_state["remaining"] = None # Unknown until the next response reports it
+            return True
+        rest_rate_limit_state["remaining"] -= 1
+        return True
+
+def record_rate_limit_headers(response: requests.Response):
+    """Updates the tracked REST quota from a response's X-RateLimit-* headers."""
+    remaining = response.headers.get("X-RateLimit-Remaining")
+    reset = response.headers.get("X-RateLimit-Reset")
+    if remaining is None or reset is None:
+        return
+    with rest_rate_limit_lock:
+        rest_rate_limit_state["remaining"] = int(remaining)
+        rest_rate_limit_state["reset"] = int(reset)
+
+def slim_rest_release(release: dict) -> dict:
+    """Keeps only the release fields this script uses (same shape as the GraphQL results)."""
+    return {
+        "tag_name": release.get("tag_name"),
+        "prerelease": release.get("prerelease", False),
+        "assets": [
+            {"name": asset.get("name", ""), "browser_download_url": asset.get("browser_download_url")}
+            for asset in release.get("assets", [])
+        ],
+    }
+
+def load_manifest(manifest_path: Path) -> tuple[dict | None, str | None]:
+    """Reads and parses one manifest. Returns (manifest_data, None) or (None, error message)."""
+    try:
+        return parse_manifest_bytes(manifest_path.read_bytes()), None
+    except FileNotFoundError:
+        return None, f"[WARNING] Manifest file '{manifest_path.name}' not found. Skipping."
+    except Exception as e:
+        return None, f"[ERROR] Could not read or parse manifest '{manifest_path.name}': {e}"
+
+def load_all_manifests(manifest_paths: list[Path]) -> dict[Path, tuple[dict | None, str | None]]:
+    """Loads several manifests in parallel, keyed by path (see load_manifest)."""
+    if not manifest_paths:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_MANIFEST_READS, len(manifest_paths))) as executor:
+        return dict(zip(manifest_paths, executor.map(load_manifest, manifest_paths)))
+
+def github_repository_exists(repo_owner_slash_repo: str) -> bool:
+    """Checks that the repo can be read through the API, to tell "no releases" apart from a wrong repo in the config."""
+    if not reserve_rest_request():
+        return False
+    try:
+        response = GITHUB_API_SESSION.get(f"https://api.github.com/repos/{repo_owner_slash_repo}", timeout=REQUEST_TIMEOUT_SECONDS)
+        record_rate_limit_headers(response)
+        return response.status_code == 200
+    except requests.exceptions.RequestException as e:
+        log.error(f"    [ERROR] Checking repository {repo_owner_slash_repo}: {e}")
+        return False
+
+def get_github_releases_info(repo_owner_slash_repo: str, allow_prerelease: bool, etag_cache: dict) -> list | None:
+    """Fetches the most recent releases (newest first) from GitHub API.
+
+    When prereleases are not allowed, only /releases/latest (the newest stable release) is
+    requested. Sends the ETag from the previous run as If-None-Match; a 304 answer (which does
+    not count against the rate limit) is served from etag_cache, a 200 answer refreshes it.
+    """
     api_url = f"https://api.github.com/repos/{repo_owner_slash_repo}/releases"
-    print(f"    Fetching releases from: {api_url}")
+    request_params = {"per_page": RELEASES_PER_PAGE}
+    if not allow_prerelease:
+        api_url += "/latest"
+        request_params = None
+    log.debug(f"    Fetching releases from: {api_url}")
+    if not reserve_rest_request():
+        log.error(f"    [ERROR] GitHub API rate limit exhausted; not fetching releases for {repo_owner_slash_repo}.")
+        return None
+    cached_entry = etag_cache.get(api_url)
+    request_headers = {"If-None-Match": cached_entry["etag"]} if cached_entry else None # Merged with the session headers
     try:
-        response = requests.get(api_url, headers=GITHUB_API_HEADERS, timeout=REQUEST_TIMEOUT_SECONDS)
+        response = GITHUB_API_SESSION.get(
+            api_url,
+            headers=request_headers,
+            params=request_params,
+            timeout=REQUEST_TIMEOUT_SECONDS
+        )
+        record_rate_limit_headers(response)
+        if response.status_code == 304 and cached_entry:
+            log.info(f"    Releases for {repo_owner_slash_repo} unchanged since last run (304 Not Modified). Using cached data.")
+            return cached_entry["releases"]
+        if response.status_code == 404 and not allow_prerelease:
+            # /releases/latest also answers 404 for a missing or private repo, which must not pass as "no release"
+            if not github_repository_exists(repo_owner_slash_repo):
+                log.error(f"    [ERROR] Fetching releases for {repo_owner_slash_repo}: repository not found or not accessible.")
+                return None
+            log.info(f"    [INFO] {repo_owner_slash_repo} has no published stable release.")
+            return []
         response.raise_for_status() 
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"    [ERROR] Fetching releases for {repo_owner_slash_repo}: {e}")
+        response_data = orjson.loads(response.content)
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+        log.error(f"    [ERROR] Fetching releases for {repo_owner_slash_repo}: {e}")
+        return None
+    if not allow_prerelease:
+        response_data = [response_data] # /releases/latest returns a single release object
+    releases = [slim_rest_release(release) for release in response_data]
+    etag = response.headers.get("ETag")
+    if etag:
+        etag_cache[api_url] = {"etag": etag, "releases": releases}
+    return releases
+
+def build_graphql_releases_query(release_queries: list[tuple[str, bool]]) -> str:
+    """Builds one GraphQL query that fetches releases for every (repo, allow_prerelease) pair via aliases (r0, r1, ...).
+
+    Pairs that do not allow prereleases only ask for the repository's latest stable release.
+    """
+    repo_fields = []
+    for index, (repo_path, allow_prerelease) in enumerate(release_queries):
+        owner, _, name = repo_path.partition("/")
+        if allow_prerelease:
+            releases_field = (
+                f"releases(first: {RELEASES_PER_PAGE}, orderBy: {{field: CREATED_AT, direction: DESC}}) "
+                "{ nodes { ...ReleaseFields } }"
+            )
+        else:
+            releases_field = "latestRelease { ...ReleaseFields }"
+        # json.dumps yields a valid GraphQL string literal (quotes and escapes included)
+        repo_fields.append(
+            f"r{index}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{ {releases_field} }}"
+        )
+    return (
+        "query { " + " ".join(repo_fields) + " } "
+        "fragment ReleaseFields on Release { tagName isPrerelease isDraft "
+        f"releaseAssets(first: {GRAPHQL_ASSETS_PER_RELEASE}) {{ nodes {{ name downloadUrl }} }} }}"
+    )
+
+def graphql_release_to_rest(release: dict) -> dict:
+    """Converts a GraphQL release node to the REST-style fields this script uses."""
+    return {
+        "tag_name": release.get("tagName"),
+        "prerelease": release.get("isPrerelease", False),
+        "assets": [
+            {"name": asset.get("name", ""), "browser_download_url": asset.get("downloadUrl")}
+            for asset in release.get("releaseAssets", {}).get("nodes", [])
+        ],
+    }
+
+def get_github_releases_info_graphql(release_queries: list[tuple[str, bool]]) -> dict[tuple[str, bool], list | None] | None:
+    """Fetches releases for up to GRAPHQL_MAX_REPOS_PER_QUERY (repo, allow_prerelease) pairs in a single GraphQL request.
+
+    Releases are returned in the same shape as the REST API ('tag_name', 'prerelease', 'assets'
+    with 'name' and 'browser_download_url'). Returns None if the whole request failed.
+    """
+    log.info(f"    Fetching releases for {len(release_queries)} repo(s) from: {GITHUB_GRAPHQL_URL}")
+    try:
+        response = GITHUB_API_SESSION.post(
+            GITHUB_GRAPHQL_URL,
+            json={"query": build_graphql_releases_query(release_queries)},
+            timeout=REQUEST_TIMEOUT_SECONDS
+        )
+        response.raise_for_status()
+        payload = orjson.loads(response.content)
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+        log.error(f"    [ERROR] Fetching releases via GraphQL: {e}")
+        return None
+
+    data = payload.get("data")
+    if not data:
+        log.error(f"    [ERROR] GraphQL response contained no data: {payload.get('errors')}")
         return None
+    if payload.get("errors"):
+        log.warning(f"    [WARNING] GraphQL reported errors for some repos: {payload['errors']}")
+
+    releases_by_query = {}
+    for index, release_query in enumerate(release_queries):
+        repository = data.get(f"r{index}")
+        if not repository:
+            releases_by_query[release_query] = None
+            continue
+        if "latestRelease" in repository:
+            release_nodes = [repository["latestRelease"]] if repository["latestRelease"] else []
+        else:
+            release_nodes = repository.get("releases", {}).get("nodes", [])
+        releases_by_query[release_query] = [
+            graphql_release_to_rest(release)
+            for release in release_nodes
+            if not release.get("isDraft") # Drafts are not downloadable by Scoop users
+        ]
+    return releases_by_query
 
-def find_asset_by_keywords(assets: list, keywords: list) -> dict | None:
+def fetch_all_releases_info(release_queries: list[tuple[str, bool]], etag_cache_path: Path) -> dict[tuple[str, bool], list | None]:
+    """Fetches release information for several (repo, allow_prerelease) pairs, keyed by pair.
+
+    With a token, releases are batch-fetched through GraphQL (one request per
+    GRAPHQL_MAX_REPOS_PER_QUERY repos); anything GraphQL could not resolve, and every repo
+    when no token is available, is fetched from the REST API concurrently using the
+    ETag cache stored at etag_cache_path.
+    """
+    if not release_queries:
+        return {}
+    releases_by_query = {}
+    if GITHUB_API_TOKEN: # The GraphQL API does not accept unauthenticated requests
+        for batch_start in range(0, len(release_queries), GRAPHQL_MAX_REPOS_PER_QUERY):
+            batch = release_queries[batch_start:batch_start + GRAPHQL_MAX_REPOS_PER_QUERY]
+            releases_by_query.update(get_github_releases_info_graphql(batch) or {})
+
+    remaining_queries = [release_query for release_query in release_queries if releases_by_query.get(release_query) is None]
+    if remaining_queries:
+        # Check the quota once up front instead of discovering it through failed requests
+        rate_limit_status = get_rate_limit_status()
+        if rate_limit_status:
+            rest_rate_limit_state.update(rate_limit_status)
+            log.info(f"    GitHub REST API quota: {rate_limit_status['remaining']} request(s) remaining for {len(remaining_queries)} fetch(es).")
+            if rate_limit_status["remaining"] < len(remaining_queries):
+                log.warning("    [WARNING] Not enough quota for all fetches; will wait for a reset if it is close, otherwise skip the rest.")
+        etag_cache = load_json_cache(etag_cache_path)
+        max_workers = min(MAX_CONCURRENT_REQUESTS, len(remaining_queries))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                lambda release_query: get_github_releases_info(*release_query, etag_cache=etag_cache),
+                remaining_queries
+            )
+            releases_by_query.update(zip(remaining_queries, results))
+        save_json_cache(etag_cache_path, etag_cache)
+    return releases_by_query
+
+def find_asset_by_keywords(assets: list, keywords: tuple[str, ...]) -> dict | None:
     """Finds an asset that contains all specified keywords in its name."""
-    print(f"      Searching for asset with keywords: {keywords} in {len(assets)} assets.")
+    log.debug(f"      Searching for asset with keywords: {keywords} in {len(assets)} assets.")
+    keywords_lower = tuple(keyword.lower() for keyword in keywords) # Lowercased once, not per asset
     for asset in assets:
         name_lower = asset.get("name", "").lower()
-        if all(keyword.lower() in name_lower for keyword in keywords):
-            print(f"      [SUCCESS] Found asset by keywords: {asset['name']}")
+        if all(keyword in name_lower for keyword in keywords_lower):
+            log.debug(f"      [SUCCESS] Found asset by keywords: {asset['name']}")
             return asset
-    print(f"      [INFO] No asset found matching all keywords: {keywords}")
+    log.debug(f"      [INFO] No asset found matching all keywords: {keywords}")
     return None
 
+def select_release_to_consider(all_releases: list, allow_prerelease: bool) -> dict | None:
+    """Picks the newest release matching allow_prerelease from a newest-first list."""
+    return next((release for release in all_releases if allow_prerelease or not release.get("prerelease", False)), None)
+
+@lru_cache(maxsize=4096)
+def parse_version_cached(version_str: str) -> Version | None:
+    """Parses a version string once per run; invalid versions yield None (also cached) instead of raising."""
+    try:
+        return parse_version(version_str)
+    except InvalidVersion:
+        return None
+
 def clean_version_from_tag(tag_name: str, prefix: str = "") -> str:
     """Cleans the version string from a git tag."""
     cleaned_version = tag_name
@@ -69,156 +397,153 @@ def clean_version_from_tag(tag_name: str, prefix: str = "") -> str:
     cleaned_version = cleaned_version.strip()
     # Attempt to match a standard version pattern (e.g., X.Y.Z, X.Y.Z-beta, etc.)
     # This helps remove any unexpected trailing characters after a valid version string.
-    version_match = re.match(r"(\d+(\.\d+)*([-.].+)?)", cleaned_version)
+    version_match = VERSION_REGEX.match(cleaned_version)
     if version_match:
         cleaned_version = version_match.group(1)
         
-    # print(f"        Original tag: '{tag_name}', Prefix: '{prefix}', Cleaned version: '{cleaned_version}'") # Verbose
+    log.debug(f"        Original tag: '{tag_name}', Prefix: '{prefix}', Cleaned version: '{cleaned_version}'")
     return cleaned_version
 
 def main():
     repo_root = Path(".").resolve()
     bucket_path_obj = repo_root / BUCKET_PATH_STR
     config_file_path_obj = repo_root / CONFIG_FILE_NAME
+    etag_cache_path_obj = repo_root / CACHE_DIR_NAME / ETAG_CACHE_FILE_NAME
     
-    print(f"Python script 'Update-AppVersionsAndUrls.py' started.")
-    print(f"Loading app configurations from: '{config_file_path_obj}'")
+    log.info(f"Python script 'Update-AppVersionsAndUrls.py' started.")
+    log.info(f"Loading app configurations from: '{config_file_path_obj}'")
     
     apps_config = load_apps_config(config_file_path_obj)
     if not apps_config:
-        print("[CRITICAL] No application configurations loaded. Exiting.")
+        log.critical("[CRITICAL] No application configurations loaded. Exiting.")
         exit(1)
             
-    print(f"Successfully loaded {len(apps_config)} app configurations.")
-    print(f"Processing manifests in: '{bucket_path_obj}'")
-    print("--- Checking for new versions and updating manifests (version, URL) ---")
+    log.info(f"Successfully loaded {len(apps_config)} app configurations.")
+    log.info(f"Processing manifests in: '{bucket_path_obj}'")
+    log.info("--- Checking for new versions and updating manifests (version, URL) ---")
 
     manifests_updated_count = 0
 
+    # Network round-trips dominate the run time, so all release lookups are issued up front in parallel.
+    # Apps only share a fetch when both repo and allow_prerelease match: a stable-only app needs the repo's latest
+    # stable release, which a short newest-first list that includes prereleases may not reach
+    release_queries = list(dict.fromkeys((app_config.repo, app_config.allow_prerelease) for app_config in apps_config))
+    log.info(f"\nFetching release info with {len(release_queries)} lookup(s) for {len(apps_config)} app(s)...")
+    releases_by_query = fetch_all_releases_info(release_queries, etag_cache_path_obj)
+
+    # Manifests are only read for apps that have a tag to compare against
+    manifest_paths_to_read = []
     for app_config in apps_config:
-        manifest_filename = app_config.get("manifest_file")
-        repo_path = app_config.get("repo")
-        asset_keywords = app_config.get("asset_keywords", [])
-        version_strip_prefix = app_config.get("version_strip_prefix", "")
-        allow_prerelease = app_config.get("allow_prerelease", False)
-
-        if not manifest_filename or not repo_path:
-            print(f"\n[WARNING] Skipping invalid app config entry: {app_config} (missing 'manifest_file' or 'repo')")
-            continue
-                
-        manifest_full_path = bucket_path_obj / manifest_filename
-        app_name = manifest_full_path.stem
+        all_releases = releases_by_query.get((app_config.repo, app_config.allow_prerelease))
+        release_to_consider = select_release_to_consider(all_releases or [], app_config.allow_prerelease)
+        if release_to_consider and release_to_consider.get("tag_name"):
+            manifest_paths_to_read.append(bucket_path_obj / app_config.manifest_file)
 
-        print(f"\nProcessing app: {app_name} (Manifest: {manifest_filename})")
+    log.info(f"\nReading {len(manifest_paths_to_read)} manifest(s)...")
+    manifests_by_path = load_all_manifests(manifest_paths_to_read)
 
-        if not manifest_full_path.exists():
-            print(f"  [WARNING] Manifest file '{manifest_filename}' not found. Skipping.")
-            continue
+    for app_config in apps_config:
+        manifest_filename = app_config.manifest_file
+        repo_path = app_config.repo
+        asset_keywords = app_config.asset_keywords
+        version_strip_prefix = app_config.version_strip_prefix
+        allow_prerelease = app_config.allow_prerelease
 
-        try:
-            with open(manifest_full_path, 'r', encoding='utf-8-sig') as f:
-                manifest_data = json.load(f)
-        except Exception as e:
-            print(f"  [ERROR] Could not read or parse manifest '{manifest_filename}': {e}")
-            continue
+        manifest_full_path = bucket_path_obj / manifest_filename
+        app_name = manifest_full_path.stem
 
-        current_version_str_from_manifest = manifest_data.get("version", "0.0.0")
-        
-        all_releases = get_github_releases_info(repo_path)
-        if not all_releases:
-            print(f"  [INFO] Could not fetch release info for {repo_path}. Skipping version check for this app.")
+        log.info(f"\nProcessing app: {app_name} (Manifest: {manifest_filename})")
+
+        all_releases = releases_by_query.get((repo_path, allow_prerelease))
+        if all_releases is None:
+            log.info(f"  [INFO] Could not fetch release info for {repo_path}. Skipping version check for this app.")
             continue
 
-        latest_release_to_consider = None
-        for release in all_releases:
-            is_prerelease = release.get("prerelease", False)
-            if not allow_prerelease and is_prerelease:
-                # print(f"    Skipping prerelease: {release.get('tag_name')}") # Verbose
-                continue 
-            latest_release_to_consider = release 
-            break 
-        
+        latest_release_to_consider = select_release_to_consider(all_releases, allow_prerelease)
         if not latest_release_to_consider:
-            if allow_prerelease and all_releases: 
-                 latest_release_to_consider = all_releases[0]
-                 print(f"  [INFO] No stable release found, considering latest prerelease: {latest_release_to_consider.get('tag_name')} for {repo_path}.")
-            else:
-                print(f"  [INFO] No suitable release (matching allow_prerelease={allow_prerelease}) found for {repo_path}. Skipping.")
-                continue
+            log.info(f"  [INFO] No suitable release (matching allow_prerelease={allow_prerelease}) found for {repo_path}. Skipping.")
+            continue
 
         latest_tag_name_from_github = latest_release_to_consider.get("tag_name")
         if not latest_tag_name_from_github:
-            print(f"  [INFO] No tag_name found in the selected release for {repo_path}. Skipping.")
+            log.info(f"  [INFO] No tag_name found in the selected release for {repo_path}. Skipping.")
+            continue
+
+        manifest_data, manifest_load_error = manifests_by_path[manifest_full_path]
+        if manifest_data is None:
+            log.warning(f"  {manifest_load_error}")
             continue
+
+        current_version_str_from_manifest = manifest_data.get("version", "0.0.0")
         
         cleaned_latest_version_from_github = clean_version_from_tag(latest_tag_name_from_github, version_strip_prefix)
-        print(f"  Current manifest version: {current_version_str_from_manifest}, Latest GitHub tag: {latest_tag_name_from_github} (Cleaned to: {cleaned_latest_version_from_github})")
+        log.info(f"  Current manifest version: {current_version_str_from_manifest}, Latest GitHub tag: {latest_tag_name_from_github} (Cleaned to: {cleaned_latest_version_from_github})")
 
         try:
             if not cleaned_latest_version_from_github: # Should not happen if tag_name exists
-                print(f"  [WARNING] Cleaned version string is empty for tag '{latest_tag_name_from_github}'. Skipping comparison.")
+                log.warning(f"  [WARNING] Cleaned version string is empty for tag '{latest_tag_name_from_github}'. Skipping comparison.")
                 continue
 
             # Robust version comparison
-            parsed_latest_version = parse_version(cleaned_latest_version_from_github)
-            parsed_current_version = parse_version(current_version_str_from_manifest)
+            parsed_latest_version = parse_version_cached(cleaned_latest_version_from_github)
+            parsed_current_version = parse_version_cached(current_version_str_from_manifest)
+            if parsed_latest_version is None or parsed_current_version is None:
+                log.error(f"  [ERROR] Invalid version string encountered for comparison: Current='{current_version_str_from_manifest}', Latest='{cleaned_latest_version_from_github}' for app {app_name}. Skipping.")
+                continue
 
             if parsed_latest_version > parsed_current_version:
-                print(f"  [UPDATE] Newer version found: {cleaned_latest_version_from_github} > {current_version_str_from_manifest}")
+                log.info(f"  [UPDATE] Newer version found: {cleaned_latest_version_from_github} > {current_version_str_from_manifest}")
                 
                 assets = latest_release_to_consider.get("assets", [])
                 if not assets:
-                    print(f"    [WARNING] No assets found in release {latest_tag_name_from_github}. Cannot update URL.")
+                    log.warning(f"    [WARNING] No assets found in release {latest_tag_name_from_github}. Cannot update URL.")
                     continue
 
                 selected_asset = find_asset_by_keywords(assets, asset_keywords)
                 
                 if selected_asset and selected_asset.get("browser_download_url"):
                     new_url = selected_asset["browser_download_url"]
-                    print(f"    New asset URL selected: {new_url}")
+                    log.info(f"    New asset URL selected: {new_url}")
 
                     manifest_data["version"] = cleaned_latest_version_from_github # Use the cleaned version
                     
                     updated_url_field = False
-                    if "architecture" in manifest_data and "64bit" in manifest_data["architecture"] and "url" in manifest_data["architecture"]["64bit"]:
-                        manifest_data["architecture"]["64bit"]["url"] = new_url
-                        manifest_data["architecture"]["64bit"]["hash"] = "" 
+                    arch_64bit = manifest_data.get("architecture", {}).get("64bit") or {}
+                    if "url" in arch_64bit:
+                        arch_64bit["url"] = new_url
+                        arch_64bit["hash"] = "" 
                         updated_url_field = True
-                        print(f"    Updated 64bit URL and cleared hash.")
+                        log.info(f"    Updated 64bit URL and cleared hash.")
                     elif "url" in manifest_data: 
                         manifest_data["url"] = new_url
                         manifest_data["hash"] = "" 
                         updated_url_field = True
-                        print(f"    Updated root URL and cleared hash.")
+                        log.info(f"    Updated root URL and cleared hash.")
                     
                     if not updated_url_field:
-                        print(f"    [WARNING] Could not find a standard 'url' field to update in manifest for {app_name}.")
+                        log.warning(f"    [WARNING] Could not find a standard 'url' field to update in manifest for {app_name}.")
                         continue 
 
                     try:
-                        with open(manifest_full_path, 'w', encoding='utf-8') as f:
-                            json.dump(manifest_data, f, indent=4, ensure_ascii=False)
-                            f.write('\n')
-                        print(f"    [SUCCESS] Manifest for {app_name} updated to version {cleaned_latest_version_from_github}. Hash cleared.")
+                        atomic_write_bytes(manifest_full_path, dump_manifest_bytes(manifest_data))
+                        log.info(f"    [SUCCESS] Manifest for {app_name} updated to version {cleaned_latest_version_from_github}. Hash cleared.")
                         manifests_updated_count += 1
                     except Exception as e:
-                        print(f"    [ERROR] Could not write updated manifest for {app_name}: {e}")
+                        log.error(f"    [ERROR] Could not write updated manifest for {app_name}: {e}")
                 else:
-                    print(f"    [WARNING] No suitable download asset found for version {cleaned_latest_version_from_github} using keywords: {asset_keywords}")
+                    log.warning(f"    [WARNING] No suitable download asset found for version {cleaned_latest_version_from_github} using keywords: {asset_keywords}")
             else:
-                print(f"  [INFO] {app_name} is already up-to-date or latest GitHub version ({cleaned_latest_version_from_github}) is not newer than manifest ({current_version_str_from_manifest}).")
+                log.info(f"  [INFO] {app_name} is already up-to-date or latest GitHub version ({cleaned_latest_version_from_github}) is not newer than manifest ({current_version_str_from_manifest}).")
         
-        except packaging.version.InvalidVersion: # Catch specific error for invalid version strings
-             print(f"  [ERROR] Invalid version string encountered for comparison: Current='{current_version_str_from_manifest}', Latest='{cleaned_latest_version_from_github}' for app {app_name}. Skipping.")
         except Exception as e: 
-            print(f"  [ERROR] During version comparison or asset finding for {app_name}: {e}")
+            log.error(f"  [ERROR] During version comparison or asset finding for {app_name}: {e}")
 
-    print("\n=========================================================")
+    log.info("\n=========================================================")
     if manifests_updated_count > 0:
-        print(f"Script finished. {manifests_updated_count} manifest(s) had their version/URL updated (hash cleared).")
+        log.info(f"Script finished. {manifests_updated_count} manifest(s) had their version/URL updated (hash cleared).")
     else:
-        print("Script finished. No manifest versions/URLs needed updating (or errors occurred).")
-    print("Reminder: The other Python script should now run to update hashes and README.")
+        log.info("Script finished. No manifest versions/URLs needed updating (or errors occurred).")
+    log.info("Reminder: The other Python script should now run to update hashes and README.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,47 @@
+# updater_common.py
+# Helpers shared by Update-AppVersionsAndUrls.py and Update-HashesAndReadme.py
+import os
+import json
+import codecs
+import logging
+import orjson
+from pathlib import Path
+
+log = logging.getLogger("updater_common")
+
+def load_json_cache(cache_file_path: Path) -> dict:
+    """Loads a JSON cache file; a missing or unreadable cache is treated as empty."""
+    try:
+        cache_data = orjson.loads(cache_file_path.read_bytes())
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        log.warning(f"[WARNING] Ignoring unreadable cache file '{cache_file_path}': {e}")
+        return {}
+    # Valid JSON of the wrong shape would otherwise break every run, since a failed job never replaces the cache
+    if not isinstance(cache_data, dict):
+        log.warning(f"[WARNING] Ignoring unreadable cache file '{cache_file_path}': expected a JSON object, got {type(cache_data).__name__}")
+        return {}
+    return cache_data
+
+def save_json_cache(cache_file_path: Path, cache_data: dict):
+    """Writes a JSON cache file. Failures are only reported, since the cache is an optimization."""
+    try:
+        cache_file_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_bytes(cache_file_path, orjson.dumps(cache_data))
+    except Exception as e:
+        log.warning(f"[WARNING] Could not write cache file '{cache_file_path}': {e}")
+
+def atomic_write_bytes(file_path: Path, data: bytes):
+    """Writes data to a sibling temp file and renames it over file_path, so readers never see a partial file."""
+    temp_file_path = file_path.with_name(file_path.name + ".tmp")
+    temp_file_path.write_bytes(data)
+    os.replace(temp_file_path, file_path)
+
+def parse_manifest_bytes(manifest_bytes: bytes):
+    """Parses a manifest's raw bytes. Manifests may carry a UTF-8 BOM, which orjson rejects."""
+    return orjson.loads(manifest_bytes.removeprefix(codecs.BOM_UTF8))
+
+def dump_manifest_bytes(manifest_data: dict) -> bytes:
+    """Serializes a manifest the way Scoop buckets format them: 4-space indentation, which orjson cannot emit."""
+    return (json.dumps(manifest_data, indent=4, ensure_ascii=False) + '\n').encode('utf-8')